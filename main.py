@@ -1,7 +1,22 @@
-import uuid
+import sys
+from functools import lru_cache
 from typing import Any, Sequence
 
-from sqlalchemy import ForeignKey, Integer, String, create_engine, select
+from sqlalchemy import (
+    Engine,
+    ForeignKey,
+    Integer,
+    Result,
+    String,
+    Text,
+    create_engine,
+    event,
+    insert,
+    inspect,
+    lambda_stmt,
+    select,
+)
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 from sqlalchemy.orm import (
     DeclarativeBase,
     Mapped,
@@ -10,17 +25,13 @@ from sqlalchemy.orm import (
     relationship,
     sessionmaker,
 )
+from sqlalchemy.pool import StaticPool
 
 
 class Base(DeclarativeBase):
     pass
 
 
-# Utils
-def generate_uuid() -> str:
-    return str(uuid.uuid4())
-
-
 # custom error
 class InviladInput(Exception):
     def __init__(self, message: str, status_code: int) -> None:
@@ -36,12 +47,10 @@ class InviladInput(Exception):
 class User(Base):
     __tablename__ = "users"
 
-    userId: Mapped[str] = mapped_column(
-        String(36), primary_key=True, default=generate_uuid
-    )
+    userId: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
     first_name: Mapped[str] = mapped_column(String(32))
     last_name: Mapped[str] = mapped_column(String(32))
-    email: Mapped[str] = mapped_column(String(32), unique=True)
+    email: Mapped[str] = mapped_column(String(254), unique=True)
     profile_name: Mapped[str] = mapped_column(String(32))
 
     # Relationship
@@ -56,11 +65,11 @@ class User(Base):
 class Post(Base):
     __tablename__ = "posts"
 
-    postId: Mapped[str] = mapped_column(
-        String(36), primary_key=True, default=generate_uuid
+    postId: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
+    user_id: Mapped[int] = mapped_column(
+        Integer, ForeignKey("users.userId"), index=True
     )
-    user_id: Mapped[str] = mapped_column(String(32), ForeignKey("users.userId"))
-    content: Mapped[str] = mapped_column(String(32))
+    content: Mapped[str] = mapped_column(Text)
 
     # Relationship
     author: Mapped["User"] = relationship(back_populates="post")
@@ -72,11 +81,13 @@ class Post(Base):
 class Like(Base):
     __tablename__ = "likes"
 
-    likeId: Mapped[str] = mapped_column(
-        String(36), primary_key=True, default=generate_uuid
+    likeId: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
+    post_id: Mapped[int] = mapped_column(
+        Integer, ForeignKey("posts.postId"), index=True
+    )
+    user_id: Mapped[int] = mapped_column(
+        Integer, ForeignKey("users.userId"), index=True
     )
-    post_id: Mapped[str] = mapped_column(String(36), ForeignKey("posts.postId"))
-    user_id: Mapped[str] = mapped_column(String(36), ForeignKey("users.userId"))
 
     # Relationship
     user: Mapped["User"] = relationship(back_populates="likes")
@@ -92,210 +103,321 @@ def add_user(
     profile_name: str,
 ) -> None:
 
-    user_exists = session.scalar(select(User).filter(User.email == email))
-    if user_exists:
+    stmt = (
+        sqlite_insert(User)
+        .values(
+            first_name=first_name,
+            last_name=last_name,
+            email=email,
+            profile_name=profile_name,
+        )
+        .on_conflict_do_nothing(index_elements=["email"])
+        .returning(User.userId)
+    )
+    if session.execute(stmt).first() is None:
         raise InviladInput(
             message=f"User with email:{email} already exist", status_code=409
         )
+    session.commit()
 
-    user = User(
-        first_name=first_name,
-        last_name=last_name,
-        email=email,
-        profile_name=profile_name,
-    )
-    session.add(user)
+
+# creating users in one transaction
+def bulk_add_users(session: Session, rows: list[dict[str, Any]]) -> None:
+    emails = [row["email"] for row in rows]
+    existing = set(session.scalars(select(User.email).where(User.email.in_(emails))))
+    new_rows = []
+    for row in rows:
+        # skip emails already stored or repeated earlier in this batch
+        if row["email"] not in existing:
+            existing.add(row["email"])
+            new_rows.append(row)
+    if new_rows:
+        session.execute(insert(User), new_rows)
     session.commit()
-    session.refresh(user)
 
 
 # creating post
-def add_post(session: Session, user: User, content: str) -> Post:
-    post = Post(author=user, content=content)
+def add_post(session: Session, user_id: int, content: str) -> Post:
+    post = Post(user_id=user_id, content=content)
     session.add(post)
     session.commit()
-    session.refresh(post)
     return post
 
 
 # creating likes
-def add_like(session: Session, user: User, post: Post) -> None:
-    new_like = Like(user=user, post=post)
+def add_like(session: Session, user_id: int, post_id: int) -> None:
+    new_like = Like(user_id=user_id, post_id=post_id)
     session.add(new_like)
     session.commit()
-    session.refresh(new_like)
 
 
 # Retreaving Post
-def get_all_posts(session: Session) -> Sequence[Post]:
-    return session.query(Post).all()
+def iter_post_rows(session: Session) -> Result[tuple[int, int, str]]:
+    return session.execute(
+        select(Post.postId, Post.user_id, Post.content).execution_options(yield_per=500)
+    )
+
+
+def iter_user_rows(session: Session) -> Result[tuple[int, str]]:
+    return session.execute(
+        select(User.userId, User.first_name).execution_options(yield_per=500)
+    )
 
 
-def get_all_users(session: Session) -> Sequence[User]:
-    return session.query(User).all()
+# (postId, user_id, content) rows by (bind, user_id), least recently used first
+POSTS_CACHE_SIZE = 256
+_posts_cache: dict[tuple[Any, int], tuple[tuple[int, int, str], ...]] = {}
 
 
-def get_post_with_user_id(session: Session, user_id: str) -> Sequence[Post]:
-    return session.scalars(select(Post).filter(Post.user_id == user_id)).all()
+def get_post_with_user_id(
+    session: Session, user_id: int
+) -> tuple[tuple[int, int, str], ...]:
+    # pending changes would be autoflushed into the result, so don't cache them
+    if session.new or session.dirty or session.deleted:
+        return _posts_for_user(session, user_id)
+    key = (session.get_bind(Post), user_id)
+    rows = _posts_cache.pop(key, None)
+    if rows is None:
+        rows = _posts_for_user(session, user_id)
+        if len(_posts_cache) >= POSTS_CACHE_SIZE:
+            _posts_cache.pop(next(iter(_posts_cache)))
+    _posts_cache[key] = rows
+    return rows
 
 
-def get_user_like_post(session: Session, post_id: str) -> Sequence | None:
-    # return session.scalars(
-    #     select(User).join(Like).filter(Like.post_id == post_id)  # noqa: ERA001
-    # ).all()
-    post = session.get(Post, post_id)
-    if post is None:
-        return []
-    return [like.user for like in post.likes]
+def _posts_for_user(session: Session, user_id: int) -> tuple[tuple[int, int, str], ...]:
+    stmt = lambda_stmt(
+        lambda: select(Post.postId, Post.user_id, Post.content)
+    ).add_criteria(lambda s: s.where(Post.user_id == user_id))
+    return tuple((row[0], row[1], row[2]) for row in session.execute(stmt))
+
+
+def clear_posts_cache(session: Session, *args: Any) -> None:
+    # sessions without a single bind may touch any database, so drop everything
+    if session.bind is None:
+        _posts_cache.clear()
+        return
+    for key in [key for key in _posts_cache if key[0] is session.bind]:
+        del _posts_cache[key]
+
+
+# drop cached posts whenever any session writes or ends a transaction on its bind
+for cache_event in (
+    "after_flush",
+    "after_commit",
+    "after_rollback",
+    "after_soft_rollback",
+):
+    event.listen(Session, cache_event, clear_posts_cache)
+
+
+def get_user_like_post(session: Session, post_id: int) -> Sequence[User]:
+    stmt = lambda_stmt(
+        lambda: select(User).join(Like, Like.user_id == User.userId)
+    ).add_criteria(lambda s: s.where(Like.post_id == post_id))
+    return session.scalars(stmt).all()
 
 
 # Test Datas
-def test_data_add_user() -> None:
-    add_user(
-        session=session,
-        first_name="Pema",
-        last_name="Dendup",
-        email="pema@gmail.com",
-        profile_name="Pema",
-    )
-    add_user(
-        session=session,
-        first_name="Dorji",
-        last_name="Zangpo",
-        email="dorjizangpo@gmail.com",
-        profile_name="Alpha",
-    )
-    add_user(
-        session=session,
-        first_name="Jigdrel",
-        last_name="Dorji",
-        email="Jigdrel@gmail.com",
-        profile_name="Joney",
-    )
-    add_user(
+def test_data_add_user(session: Session) -> None:
+    bulk_add_users(
         session=session,
-        first_name="Sangay",
-        last_name="Nidup",
-        email="sangayy@gmail.com",
-        profile_name="Sangay",
-    )
-    add_user(
-        session=session,
-        first_name="Pema",
-        last_name="Wangmo",
-        email="pema.wangmo99@outlook.com",
-        profile_name="PemaW",
-    )
-    add_user(
-        session=session,
-        first_name="Tenzin",
-        last_name="Dorji",
-        email="tenzin.dorji@druknet.bt",
-        profile_name="TenzinD",
-    )
-    add_user(
-        session=session,
-        first_name="Sonam",
-        last_name="Choden",
-        email="sonamcho@gmail.com",
-        profile_name="Sona_Cho",
-    )
-    add_user(
-        session=session,
-        first_name="Ugyen",
-        last_name="Tshering",
-        email="ugyentshering@gmail.com",
-        profile_name="UgyenT",
-    )
-    add_user(
-        session=session,
-        first_name="Karma",
-        last_name="Loday",
-        email="karmaloday7@gmail.com",
-        profile_name="KarmaL",
-    )
-    add_user(
-        session=session,
-        first_name="Dechen",
-        last_name="Zangmo",
-        email="dechenz@outlook.com",
-        profile_name="DechenZ",
+        rows=[
+            {
+                "first_name": "Pema",
+                "last_name": "Dendup",
+                "email": "pema@gmail.com",
+                "profile_name": "Pema",
+            },
+            {
+                "first_name": "Dorji",
+                "last_name": "Zangpo",
+                "email": "dorjizangpo@gmail.com",
+                "profile_name": "Alpha",
+            },
+            {
+                "first_name": "Jigdrel",
+                "last_name": "Dorji",
+                "email": "Jigdrel@gmail.com",
+                "profile_name": "Joney",
+            },
+            {
+                "first_name": "Sangay",
+                "last_name": "Nidup",
+                "email": "sangayy@gmail.com",
+                "profile_name": "Sangay",
+            },
+            {
+                "first_name": "Pema",
+                "last_name": "Wangmo",
+                "email": "pema.wangmo99@outlook.com",
+                "profile_name": "PemaW",
+            },
+            {
+                "first_name": "Tenzin",
+                "last_name": "Dorji",
+                "email": "tenzin.dorji@druknet.bt",
+                "profile_name": "TenzinD",
+            },
+            {
+                "first_name": "Sonam",
+                "last_name": "Choden",
+                "email": "sonamcho@gmail.com",
+                "profile_name": "Sona_Cho",
+            },
+            {
+                "first_name": "Ugyen",
+                "last_name": "Tshering",
+                "email": "ugyentshering@gmail.com",
+                "profile_name": "UgyenT",
+            },
+            {
+                "first_name": "Karma",
+                "last_name": "Loday",
+                "email": "karmaloday7@gmail.com",
+                "profile_name": "KarmaL",
+            },
+            {
+                "first_name": "Dechen",
+                "last_name": "Zangmo",
+                "email": "dechenz@outlook.com",
+                "profile_name": "DechenZ",
+            },
+        ],
     )
 
 
 # showing Output
-def display_all_posts() -> None:
-    print("All Posts")
-    print(
-        "-----------------------------------------------------------------------------------------------------"
+def display_all_posts(session: Session) -> None:
+    lines = [
+        "All Posts",
+        "-----------------------------------------------------------------------------------------------------",
+    ]
+    sys.stdout.write("\n".join(lines) + "\n")
+    row_format = "{}  |  {}  |  {}".format
+    for rows in iter_post_rows(session=session).partitions():
+        sys.stdout.write("\n".join(row_format(*row) for row in rows) + "\n")
+
+
+def display_all_user(session: Session) -> None:
+    lines = [
+        "All Uaers",
+        "-----------------------------------------------------------------------------------------------------",
+    ]
+    sys.stdout.write("\n".join(lines) + "\n")
+    row_format = "{}  |  {}".format
+    for rows in iter_user_rows(session=session).partitions():
+        sys.stdout.write("\n".join(row_format(*row) for row in rows) + "\n")
+
+
+def display_users_post(session: Session, user_id: int) -> None:
+    lines = [
+        "post by user",
+        "-----------------------------------------------------------------------------------------------------",
+    ]
+    post_by_user = get_post_with_user_id(session=session, user_id=user_id)
+    lines.extend(
+        f"{post_id}  |  {post_user_id}  |  {content}"
+        for post_id, post_user_id, content in post_by_user
     )
-    all_post = get_all_posts(session=session)
-    for post in all_post:
-        print(post.postId, " | ", post.user_id, " | ", post.content)
+    sys.stdout.write("\n".join(lines) + "\n")
 
 
-def display_all_user() -> None:
-    print("All Uaers")
-    print(
-        "-----------------------------------------------------------------------------------------------------"
+def display_user_like_post(session: Session, post_id: int) -> None:
+    users = get_user_like_post(session=session, post_id=post_id)
+    lines = [f"Post ID: {post_id}, Total Likes:{len(users)}\nThey are: "]
+    lines.extend(
+        f"Name: {user.first_name} {user.last_name} \t email: {user.email}"
+        for user in users
     )
-    all_user = get_all_users(session=session)
-    for user in all_user:
-        print(user.userId, " | ", user.first_name)
+    sys.stdout.write("\n".join(lines) + "\n")
 
 
-def display_users_post(user_id: str) -> None:
-    print("post by user")
-    print(
-        "-----------------------------------------------------------------------------------------------------"
+# assining database engine
+db = "sqlite:///socialDB.db"
+
+
+# sqlite tuning for every new connection
+def set_sqlite_pragma(dbapi_connection: Any, connection_record: Any) -> None:
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute("PRAGMA synchronous=NORMAL")
+    cursor.execute("PRAGMA temp_store=MEMORY")
+    cursor.execute("PRAGMA cache_size=-65536")
+    cursor.close()
+
+
+# built on first use and shared by every caller
+@lru_cache(maxsize=1)
+def get_engine() -> Engine:
+    engine = create_engine(
+        url=db,
+        echo=False,
+        poolclass=StaticPool,
+        connect_args={"check_same_thread": False},
     )
-    post_by_user = get_post_with_user_id(session=session, user_id=user_id)
-    for post in post_by_user:
-        print(post.postId, " | ", post.user_id, " | ", post.content)
+    event.listen(engine, "connect", set_sqlite_pragma)
+    return engine
 
 
-def display_user_like_post(post_id: str) -> None:
-    users: Sequence | None = get_user_like_post(session=session, post_id=post_id)
-    if users is None:
-        return
-    print(f"Post ID: {post_id}, Total Likes:{len(users)}\nThey are: ")
-    for user in users:
-        print(f"Name: {user.first_name} {user.last_name} \t email: {user.email}")
+# socialDB.db files created before the switch to INTEGER keys
+def has_string_keys(engine: Engine) -> bool:
+    inspector = inspect(engine)
+    if not inspector.has_table(User.__tablename__):
+        return False
+    columns = {
+        column["name"]: column["type"]
+        for column in inspector.get_columns(User.__tablename__)
+    }
+    return not isinstance(columns["userId"], Integer)
 
 
-# assining database engine
-db = "sqlite:///socialDB.db"
-engine = create_engine(url=db, echo=False)
+# creating session
+SessionLocal = sessionmaker(expire_on_commit=False)
 
 
-# creating table
-Base.metadata.create_all(bind=engine)  # noqa: ERA001
+def get_session() -> Session:
+    return SessionLocal(bind=get_engine())
 
-# creating session
-SessionLocal = sessionmaker(bind=engine)
-
-# code goes here with satement
-with SessionLocal() as session:
-    # pema = User(
-    #     first_name="Pema1",
-    #     last_name="Dendup",
-    #     email="pema1231@gmail.com",
-    #     profile_name="Pema",
-    # )
-    # dorji = User(
-    #     first_name="Dorji1",
-    #     last_name="Zangpo",
-    #     email="dorji1231@gmail.com",
-    #     profile_name="Alpha",
-    # )
-    # session.add_all([pema, dorji])
-    # session.commit()
-    # session.refresh(pema)
-    # session.refresh(dorji)
-
-    # p_post = add_post(session=session, user=pema, content="Happy Jurmey")
-    # d_post = add_post(session=session, user=dorji, content="Happy Jurmey")
-
-    # p_liked_d = add_like(session=session, user=pema, post=d_post)
-    # d_liked_p = add_like(session=session, user=dorji, post=p_post)
-    display_user_like_post("2b03dea3-eadc-4a81-9474-48bf15a9cdd8")
+
+if __name__ == "__main__":
+    engine = get_engine()
+
+    # create_all won't alter old tables, and their keys would never match
+    if has_string_keys(engine):
+        raise SystemExit(
+            f"{engine.url.database} uses the old string UUID keys, "
+            "delete it and run again to recreate the tables with INTEGER keys"
+        )
+
+    # creating table
+    Base.metadata.create_all(bind=engine)  # noqa: ERA001
+
+    # create_all skips existing tables, so add any missing indexes explicitly
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(bind=engine, checkfirst=True)
+
+    # code goes here with satement
+    with get_session() as session:
+        # pema = User(
+        #     first_name="Pema1",
+        #     last_name="Dendup",
+        #     email="pema1231@gmail.com",
+        #     profile_name="Pema",
+        # )
+        # dorji = User(
+        #     first_name="Dorji1",
+        #     last_name="Zangpo",
+        #     email="dorji1231@gmail.com",
+        #     profile_name="Alpha",
+        # )
+        # session.add_all([pema, dorji])
+        # session.commit()
+
+        # p_post = add_post(session=session, user_id=pema.userId, content="Happy Jurmey")
+        # d_post = add_post(session=session, user_id=dorji.userId, content="Happy Jurmey")
+
+        # add_like(session=session, user_id=pema.userId, post_id=d_post.postId)
+        # add_like(session=session, user_id=dorji.userId, post_id=p_post.postId)
+        display_user_like_post(session=session, post_id=1)
@@ -0,0 +1,185 @@
+from collections.abc import Iterator
+from pathlib import Path
+
+import pytest
+from sqlalchemy import create_engine, select, text
+from sqlalchemy.orm import Session
+
+import main
+
+
+@pytest.fixture
+def session(tmp_path: Path) -> Iterator[Session]:
+    engine = create_engine(url=f"sqlite:///{tmp_path / 'test.db'}")
+    main.Base.metadata.create_all(bind=engine)
+    with main.SessionLocal(bind=engine) as session:
+        yield session
+    engine.dispose()
+
+
+@pytest.fixture
+def user_id(session: Session) -> int:
+    main.add_user(
+        session=session,
+        first_name="Pema",
+        last_name="Dendup",
+        email="pema@gmail.com",
+        profile_name="Pema",
+    )
+    return session.scalars(select(main.User.userId)).one()
+
+
+def test_add_user_rejects_duplicate_email(session: Session, user_id: int) -> None:
+    with pytest.raises(main.InviladInput) as error:
+        main.add_user(
+            session=session,
+            first_name="Other",
+            last_name="Person",
+            email="pema@gmail.com",
+            profile_name="Other",
+        )
+
+    assert error.value.status_code == 409
+    users = session.scalars(select(main.User)).all()
+    assert [(user.userId, user.first_name) for user in users] == [(user_id, "Pema")]
+
+
+def test_bulk_add_users_inserts_each_email_once(session: Session, user_id: int) -> None:
+    def row(first_name: str, email: str) -> dict[str, str]:
+        return {
+            "first_name": first_name,
+            "last_name": "Dorji",
+            "email": email,
+            "profile_name": first_name,
+        }
+
+    main.bulk_add_users(session=session, rows=[])
+    main.bulk_add_users(
+        session=session,
+        rows=[
+            row("Tenzin", "tenzin@gmail.com"),
+            row("Again", "tenzin@gmail.com"),
+            row("Stored", "pema@gmail.com"),
+            row("Karma", "karma@gmail.com"),
+        ],
+    )
+
+    users = session.execute(
+        select(main.User.email, main.User.first_name).order_by(main.User.userId)
+    ).all()
+    assert [tuple(user) for user in users] == [
+        ("pema@gmail.com", "Pema"),
+        ("tenzin@gmail.com", "Tenzin"),
+        ("karma@gmail.com", "Karma"),
+    ]
+
+
+def test_posts_cache_refreshes_after_commit(session: Session, user_id: int) -> None:
+    assert main.get_post_with_user_id(session, user_id) == ()
+
+    post = main.add_post(session=session, user_id=user_id, content="Happy Jurmey")
+
+    assert main.get_post_with_user_id(session, user_id) == (
+        (post.postId, user_id, "Happy Jurmey"),
+    )
+
+
+def test_posts_cache_skips_pending_and_drops_rolled_back_rows(
+    session: Session, user_id: int
+) -> None:
+    session.add(main.Post(user_id=user_id, content="uncommitted"))
+    assert len(main.get_post_with_user_id(session, user_id)) == 1
+    session.rollback()
+    assert main.get_post_with_user_id(session, user_id) == ()
+
+    session.add(main.Post(user_id=user_id, content="flushed"))
+    session.flush()
+    assert len(main.get_post_with_user_id(session, user_id)) == 1
+    session.rollback()
+    assert main.get_post_with_user_id(session, user_id) == ()
+
+
+def test_posts_cache_is_per_database(tmp_path: Path) -> None:
+    engines = [
+        create_engine(url=f"sqlite:///{tmp_path / name}") for name in ("1.db", "2.db")
+    ]
+    for engine in engines:
+        main.Base.metadata.create_all(bind=engine)
+    with main.SessionLocal(bind=engines[0]) as s1, Session(engines[1]) as s2:
+        for session in (s1, s2):
+            main.add_user(session, "Pema", "Dendup", "pema@gmail.com", "Pema")
+        assert main.get_post_with_user_id(s2, 1) == ()
+
+        post = main.add_post(session=s1, user_id=1, content="db1 post")
+
+        assert main.get_post_with_user_id(s1, 1) == ((post.postId, 1, "db1 post"),)
+        assert main.get_post_with_user_id(s2, 1) == ()
+    for engine in engines:
+        engine.dispose()
+
+
+def test_posts_cache_cleared_by_plain_session_commit(
+    session: Session, user_id: int
+) -> None:
+    main.add_post(session=session, user_id=user_id, content="first")
+    assert len(main.get_post_with_user_id(session, user_id)) == 1
+
+    with Session(session.get_bind()) as other:
+        main.add_post(session=other, user_id=user_id, content="second")
+
+    assert len(main.get_post_with_user_id(session, user_id)) == 2
+
+
+def test_get_user_like_post_returns_only_likers(session: Session) -> None:
+    main.test_data_add_user(session=session)
+    users = session.scalars(select(main.User).order_by(main.User.userId)).all()
+    post = main.add_post(session=session, user_id=users[0].userId, content="Hi")
+    other = main.add_post(session=session, user_id=users[1].userId, content="Yo")
+    for user in users[1:4]:
+        main.add_like(session=session, user_id=user.userId, post_id=post.postId)
+    main.add_like(session=session, user_id=users[5].userId, post_id=other.postId)
+
+    likers = main.get_user_like_post(session=session, post_id=post.postId)
+
+    assert sorted(user.userId for user in likers) == [
+        user.userId for user in users[1:4]
+    ]
+    # loaded users keep normal lazy loading for later use in the session
+    author = next(user for user in likers if user.userId == users[1].userId)
+    assert [post.postId for post in author.post] == [other.postId]
+
+
+def test_has_string_keys_detects_old_uuid_schema(tmp_path: Path) -> None:
+    engine = create_engine(url=f"sqlite:///{tmp_path / 'old.db'}")
+    assert not main.has_string_keys(engine)
+
+    with engine.begin() as connection:
+        connection.execute(text('CREATE TABLE users ("userId" VARCHAR(36))'))
+    assert main.has_string_keys(engine)
+    engine.dispose()
+
+
+def test_has_string_keys_accepts_current_schema(session: Session) -> None:
+    assert not main.has_string_keys(session.get_bind())
+
+
+def test_display_helpers_use_the_given_session(
+    session: Session, capsys: pytest.CaptureFixture[str]
+) -> None:
+    main.test_data_add_user(session=session)
+    pema = session.scalars(
+        select(main.User.userId).where(main.User.email == "pema@gmail.com")
+    ).one()
+    post = main.add_post(session=session, user_id=pema, content="Happy Jurmey")
+    main.add_like(session=session, user_id=pema, post_id=post.postId)
+
+    main.display_all_posts(session=session)
+    main.display_all_user(session=session)
+    main.display_users_post(session=session, user_id=pema)
+    main.display_user_like_post(session=session, post_id=post.postId)
+
+    out = capsys.readouterr().out
+    assert f"{post.postId}  |  {pema}  |  Happy Jurmey" in out
+    assert f"{pema}  |  Pema" in out
+    assert f"Post ID: {post.postId}, Total Likes:1" in out
+    assert "Name: Pema Dendup \t email: pema@gmail.com" in out